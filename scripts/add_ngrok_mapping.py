@@ -1,10 +1,11 @@
 #!/usr/bin/env python3
-"""Add ngrok authtoken mapping to env_var_mappings parquet file via MCP server."""
+"""Add ngrok authtoken (or a file of) mappings to env_var_mappings parquet file via MCP server."""
 
 import os
 import sys
 import asyncio
 import json
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 # Try to import MCP client
@@ -15,6 +16,20 @@ except ImportError:
     print("Error: MCP library not installed. Install with: pip install mcp")
     sys.exit(1)
 
+# Optional, version-dependent pieces used only to recognise a dead connection
+try:
+    import anyio
+except ImportError:
+    anyio = None
+try:
+    from mcp.shared import exceptions as mcp_exceptions
+except ImportError:
+    mcp_exceptions = None
+try:
+    import mcp.types as mcp_types
+except ImportError:
+    mcp_types = None
+
 # Get paths from environment or use defaults
 PARQUET_MCP_SERVER_PATH = os.getenv(
     "PARQUET_MCP_SERVER_PATH",
@@ -29,9 +44,93 @@ DATA_DIR = os.getenv(
     "/Users/markmhendrickson/Library/Mobile Documents/com~apple~CloudDocs/Documents/data"
 )
 
-async def add_ngrok_mapping():
-    """Add NGROK_AUTHTOKEN mapping to env_var_mappings."""
+# Errors meaning the server process or its stdio streams are gone
+TRANSPORT_ERRORS = (ConnectionError, EOFError)
+if anyio is not None:
+    TRANSPORT_ERRORS += (anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream)
+
+# The MCP error class was renamed McpError -> MCPError in mcp 2.x
+MCP_ERROR_TYPES = tuple(
+    t for t in (getattr(mcp_exceptions, "MCPError", None), getattr(mcp_exceptions, "McpError", None))
+    if t is not None
+)
+CONNECTION_CLOSED = getattr(mcp_types, "CONNECTION_CLOSED", -32000)
+
+def _is_transport_error(e):
+    """Return True if e means the MCP session is dead rather than one call failing."""
+    if MCP_ERROR_TYPES and isinstance(e, MCP_ERROR_TYPES):
+        code = getattr(getattr(e, "error", None), "code", getattr(e, "code", None))
+        return code == CONNECTION_CLOSED
+    return isinstance(e, TRANSPORT_ERRORS)
+
+@asynccontextmanager
+async def mcp_session():
+    """Start the parquet MCP server and yield an initialized session, closing both on exit.
     
+    Reuse the yielded session for every call in a script to pay server start-up once.
+    It must be entered and exited in the same task (stdio_client runs an anyio task group).
+    """
+    server_params = StdioServerParameters(
+        command=PARQUET_MCP_PYTHON,
+        args=[PARQUET_MCP_SERVER_PATH],
+        env={"DATA_DIR": DATA_DIR}
+    )
+    async with stdio_client(server_params) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            yield session
+
+NGROK_MAPPING = {
+    "env_var": "NGROK_AUTHTOKEN",
+    "op_reference": "op://Private/ngrok Ngrok/authtoken – neotoma (development)",
+    "vault": "Private",
+    "item_name": "ngrok Ngrok",
+    "field_label": "authtoken – neotoma (development)",
+    "service": "ngrok",
+    "is_optional": True,
+    "environment_based": True,
+    "environment_key": "development",
+    "notes": "ngrok authtoken for development environment HTTPS tunneling"
+}
+
+def load_mappings(path):
+    """Load a list of mapping records from a JSON or YAML file.
+    
+    Raises ValueError with a readable message if the file cannot be read or parsed.
+    """
+    path = Path(path)
+    try:
+        with open(path, encoding="utf-8") as f:
+            if path.suffix in (".yaml", ".yml"):
+                try:
+                    import yaml
+                except ImportError:
+                    raise ValueError("PyYAML is required for YAML mapping files (pip install pyyaml)")
+                try:
+                    records = yaml.safe_load(f)
+                except yaml.YAMLError as e:
+                    raise ValueError(f"Invalid YAML in {path}: {e}")
+            else:
+                try:
+                    records = json.load(f)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Invalid JSON in {path}: {e}")
+    except OSError as e:
+        raise ValueError(f"Cannot read mappings file {path}: {e}")
+    return records if isinstance(records, list) else [records]
+
+def validate_mappings(records):
+    """Return a list of problems with records (empty if every record is a dict with env_var)."""
+    problems = []
+    for i, record in enumerate(records, 1):
+        if not isinstance(record, dict):
+            problems.append(f"record {i} is not a mapping object: {record!r}")
+        elif not record.get("env_var"):
+            problems.append(f"record {i} has no env_var")
+    return problems
+
+def _check_server_paths():
+    """Return True if the MCP server Python and script exist, printing help otherwise."""
     # Check if Python executable exists
     if not Path(PARQUET_MCP_PYTHON).exists():
         print(f"Error: Python executable not found: {PARQUET_MCP_PYTHON}")
@@ -44,56 +143,133 @@ async def add_ngrok_mapping():
         print("Please set PARQUET_MCP_SERVER_PATH environment variable to correct path")
         return False
     
-    server_params = StdioServerParameters(
-        command=PARQUET_MCP_PYTHON,
-        args=[PARQUET_MCP_SERVER_PATH],
-        env={"DATA_DIR": DATA_DIR}
-    )
+    return True
+
+async def _add_records(session, pending, added, failed, unknown):
+    """Send pending records over session, moving each env_var into added/failed/unknown.
     
-    try:
-        async with stdio_client(server_params) as (read, write):
-            async with ClientSession(read, write) as session:
-                await session.initialize()
-                
-                # Add the mapping
-                result = await session.call_tool("add_record", {
-                    "data_type": "env_var_mappings",
-                    "record": {
-                        "env_var": "NGROK_AUTHTOKEN",
-                        "op_reference": "op://Private/ngrok Ngrok/authtoken – neotoma (development)",
-                        "vault": "Private",
-                        "item_name": "ngrok Ngrok",
-                        "field_label": "authtoken – neotoma (development)",
-                        "service": "ngrok",
-                        "is_optional": True,
-                        "environment_based": True,
-                        "environment_key": "development",
-                        "notes": "ngrok authtoken for development environment HTTPS tunneling"
-                    }
-                })
-                
-                if result.isError:
-                    print(f"Error adding mapping: {result.content}")
-                    return False
-                
-                print("✓ Successfully added NGROK_AUTHTOKEN mapping to env_var_mappings")
-                print(f"  Environment variable: NGROK_AUTHTOKEN")
-                print(f"  1Password reference: op://Private/ngrok Ngrok/authtoken – neotoma (development)")
-                print(f"  Service: ngrok")
-                print(f"  Environment: development")
-                print("\nNext steps:")
-                print("  1. Run: npm run sync:env (or bash scripts/sync-env-from-1password.sh)")
-                print("  2. Verify NGROK_AUTHTOKEN is synced to .env")
-                return True
-                
-    except Exception as e:
-        print(f"Error connecting to MCP server: {e}")
-        print("\nTroubleshooting:")
-        print(f"  1. Check Python path: {PARQUET_MCP_PYTHON}")
-        print(f"  2. Check MCP server path: {PARQUET_MCP_SERVER_PATH}")
-        print(f"  3. Check DATA_DIR: {DATA_DIR}")
+    Records are removed from pending before they are sent, so a record that was in
+    flight when the session died is never resent: it is left in unknown, since
+    add_record is not idempotent and it may or may not have been written.
+    """
+    while pending:
+        record = pending.pop(0)
+        env_var = record["env_var"]
+        unknown.append(env_var)
+        try:
+            result = await session.call_tool("add_record", {
+                "data_type": "env_var_mappings",
+                "record": record
+            })
+        except Exception as e:
+            if _is_transport_error(e):
+                print(f"MCP server connection lost while adding {env_var}: {e}")
+                return
+            unknown.remove(env_var)
+            print(f"Error adding {env_var} mapping: {e}")
+            failed.append(env_var)
+            continue
+        unknown.remove(env_var)
+        
+        if result.isError:
+            print(f"Error adding {env_var} mapping: {result.content}")
+            failed.append(env_var)
+            continue
+        
+        added.append(env_var)
+        print(f"✓ Successfully added {env_var} mapping to env_var_mappings")
+        print(f"  1Password reference: {record.get('op_reference')}")
+        print(f"  Service: {record.get('service')}")
+        if record.get("environment_key"):
+            print(f"  Environment: {record['environment_key']}")
+
+async def add_mappings(records, session=None):
+    """Add env_var_mappings records over one MCP session.
+    
+    Pass a session from mcp_session() to share it with other calls; otherwise one
+    is started for this batch and restarted once, for records never sent, if the
+    server dies part-way.
+    """
+    
+    # Reject malformed records before starting the server
+    problems = validate_mappings(records)
+    if problems:
+        print("Error: invalid mapping records:")
+        for problem in problems:
+            print(f"  - {problem}")
         return False
+    
+    pending = list(records)
+    added = []
+    failed = []
+    unknown = []
+    if session is not None:
+        await _add_records(session, pending, added, failed, unknown)
+    else:
+        if not _check_server_paths():
+            return False
+        
+        for attempt in range(2):
+            connected = False
+            try:
+                async with mcp_session() as own_session:
+                    connected = True
+                    await _add_records(own_session, pending, added, failed, unknown)
+            except Exception as e:
+                if not connected:
+                    print(f"Error connecting to MCP server: {e}")
+                    print("\nTroubleshooting:")
+                    print(f"  1. Check Python path: {PARQUET_MCP_PYTHON}")
+                    print(f"  2. Check MCP server path: {PARQUET_MCP_SERVER_PATH}")
+                    print(f"  3. Check DATA_DIR: {DATA_DIR}")
+                    break
+                # Closing a dead session can raise; progress is already recorded in the lists
+            
+            # A dead session is never reused: start a fresh server once for unsent records
+            if not pending or attempt == 1:
+                break
+            print(f"Restarting MCP server for {len(pending)} unsent mappings...")
+    
+    failed.extend(record["env_var"] for record in pending)
+    
+    if len(records) > 1 or failed or unknown:
+        print(f"\nAdded {len(added)} of {len(records)} mappings, {len(failed)} failed, "
+              f"{len(unknown)} unknown")
+        if failed:
+            print(f"  Failed: {', '.join(failed)}")
+        if unknown:
+            print(f"  Unknown (connection lost mid-call; check env_var_mappings before re-running): "
+                  f"{', '.join(unknown)}")
+    return not failed and not unknown
+
+async def add_ngrok_mapping(session=None):
+    """Add NGROK_AUTHTOKEN mapping to env_var_mappings."""
+    if not await add_mappings([NGROK_MAPPING], session=session):
+        return False
+    
+    print("\nNext steps:")
+    print("  1. Run: npm run sync:env (or bash scripts/sync-env-from-1password.sh)")
+    print("  2. Verify NGROK_AUTHTOKEN is synced to .env")
+    return True
+
+async def main(mappings_file=None):
+    """Run the CLI: add mappings from mappings_file, or the NGROK_AUTHTOKEN mapping."""
+    if mappings_file:
+        try:
+            records = load_mappings(mappings_file)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return False
+        return await add_mappings(records)
+    return await add_ngrok_mapping()
 
 if __name__ == "__main__":
-    success = asyncio.run(add_ngrok_mapping())
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Add env var mappings via the parquet MCP server")
+    parser.add_argument("mappings_file", nargs="?",
+                        help="JSON or YAML file with a list of mapping records (default: NGROK_AUTHTOKEN only)")
+    args = parser.parse_args()
+    
+    success = asyncio.run(main(args.mappings_file))
     sys.exit(0 if success else 1)
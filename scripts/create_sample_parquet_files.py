@@ -2,79 +2,323 @@
 """
 Create sample versions of all parquet files with 50 records each
 
-Reads each parquet file, takes first 50 rows, and writes to a sample file
+Streams the first 50 rows of each parquet file and writes them to a sample file
 Sample files are saved in the same directory with "_sample" suffix
 """
 
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-import pandas as pd
+import pyarrow as pa
+import pyarrow.fs
+import pyarrow.parquet as pq
+
+try:
+    import polars as pl
+except ImportError:
+    pl = None
 
 DATA_DIR = os.getenv("DATA_DIR", "/Users/markmhendrickson/Documents/data")
 SAMPLE_SIZE = 50
+# Optional comma-separated column projection (overridden by --columns)
+SAMPLE_COLUMNS = os.getenv("SAMPLE_COLUMNS")
+# Buffered read size; pre-buffering coalesces column chunk reads into fewer, larger requests
+READ_BUFFER_SIZE = 1 << 20
+# Memory mapping is opt-in: DATA_DIR is often iCloud-backed, where mmap is unsafe
+MEMORY_MAP = os.getenv("PARQUET_MEMORY_MAP", "").lower() in ("1", "true", "yes")
+# Filesystem handles shared by every read and write in this process
+MMAP_FS = pa.fs.LocalFileSystem(use_mmap=True)
+PLAIN_FS = pa.fs.LocalFileSystem()
+
+def _filesystem_for(path):
+    """Return the shared filesystem handle appropriate for path"""
+    # Resolve symlinks so iCloud files reached via ~/Documents are still recognised
+    if MEMORY_MAP and "Mobile Documents" not in os.path.realpath(path):
+        return MMAP_FS
+    return PLAIN_FS
+
+def _walk_parquet_entries(directory):
+    """Yield (DirEntry, sample entries by name in its directory) for parquet files, excluding samples and snapshots"""
+    # Skip unreadable directories (macOS privacy prompts, iCloud placeholders) like rglob did
+    try:
+        with os.scandir(directory) as it:
+            entries = list(it)
+    except OSError:
+        return
+    
+    # One listing per directory tells us which samples already exist
+    samples_in_dir = {e.name: e for e in entries if e.name.endswith("_sample.parquet")}
+    
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            yield from _walk_parquet_entries(entry.path)
+        elif (entry.name.endswith(".parquet")
+              and "_sample" not in entry.name
+              and "snapshots" not in entry.path):
+            yield entry, samples_in_dir
 
 def find_parquet_files(root_dir):
     """Find all parquet files in root_dir, excluding samples and snapshots"""
     files = []
-    root_path = Path(root_dir)
     
-    for parquet_file in root_path.rglob("*.parquet"):
-        # Skip sample files and snapshots
-        if "_sample" in parquet_file.name or "snapshots" in str(parquet_file):
-            continue
-        
-        sample_path = parquet_file.parent / parquet_file.name.replace(".parquet", "_sample.parquet")
+    # DirEntry caches its stat result, so each file is stat'ed at most once
+    for entry, samples_in_dir in _walk_parquet_entries(root_dir):
+        parquet_file = Path(entry.path)
+        sample_name = parquet_file.name.replace(".parquet", "_sample.parquet")
+        sample_entry = samples_in_dir.get(sample_name)
+        source_stat = entry.stat()
         
         files.append({
             "source": parquet_file,
-            "sample": sample_path,
-            "name": parquet_file.name
+            "sample": parquet_file.parent / sample_name,
+            "sample_exists": sample_entry is not None,
+            "name": parquet_file.name,
+            "size": source_stat.st_size,
+            "source_mtime": source_stat.st_mtime,
+            "sample_mtime": sample_entry.stat().st_mtime if sample_entry else None,
         })
     
     return files
 
-def create_sample_file(source_path, sample_path):
-    """Create a sample parquet file with first 50 rows"""
+# Codecs pq.write_table can produce
+WRITABLE_CODECS = {"snappy", "gzip", "brotli", "zstd", "lz4"}
+
+def _source_compression(pf):
+    """Return the source file's compression codec for pq.write_table (snappy if unknown or unwritable)"""
     try:
-        # Check file size first - skip if too large (might be corrupted or problematic)
-        file_size_mb = source_path.stat().st_size / (1024 * 1024)
-        if file_size_mb > 100:  # Skip files larger than 100MB
-            print(f"  ⚠️  Skipping {source_path.name}: file too large ({file_size_mb:.1f} MB)")
-            return False
+        codec = pf.metadata.row_group(0).column(0).compression.lower()
+    except Exception:
+        return "snappy"
+    if codec == "uncompressed":
+        return None
+    # pq.write_table spells LZ4_RAW as "lz4"
+    if codec == "lz4_raw":
+        codec = "lz4"
+    return codec if codec in WRITABLE_CODECS else "snappy"
+
+def _project_columns(columns, available, name):
+    """Return the requested columns present in available, or None if there are none
+    
+    Parquet readers silently ignore unknown column names, which would otherwise
+    produce samples missing columns or with no columns at all.
+    """
+    missing = [c for c in columns if c not in available]
+    projected = [c for c in columns if c in available]
+    if not projected:
+        print(f"  ⚠️  Skipping {name}: none of the requested columns exist ({', '.join(columns)})")
+        return None
+    if missing:
+        print(f"    {name} lacks columns {', '.join(missing)}; sampling {', '.join(projected)}")
+    return projected
+
+def _write_sample(table, sample_path, compression):
+    """Write a sample table, tuned for cheap encoding of a tiny output"""
+    # Compression ratio barely matters at 50 rows, so use the fastest level where one exists
+    compression_level = 1 if compression in ("zstd", "gzip", "brotli") else None
+    pq.write_table(
+        table,
+        os.path.abspath(sample_path),
+        filesystem=_filesystem_for(sample_path),
+        compression=compression,
+        compression_level=compression_level,
+        use_dictionary=True,
+        write_batch_size=64,
+        data_page_size=64 * 1024,
+    )
+
+def create_sample_file(source_path, sample_path, columns=None, size=None, engine="arrow"):
+    """Create a sample parquet file with first 50 rows, optionally projected to columns"""
+    try:
+        if size is None:
+            size = source_path.stat().st_size
+        file_size_mb = size / (1024 * 1024)
         
-        # Read parquet file with timeout protection
+        # Only the first batch is decoded, so large files no longer need to be skipped
         print(f"    Reading {source_path.name} ({file_size_mb:.2f} MB)...")
-        df = pd.read_parquet(source_path, engine='pyarrow')
-        
-        print(f"    File has {len(df)} rows, taking first {min(SAMPLE_SIZE, len(df))}...")
-        
-        # Take first 50 rows (or all if less than 50)
-        sample_size = min(SAMPLE_SIZE, len(df))
-        df_sample = df.head(sample_size)
+        pf = pq.ParquetFile(
+            os.path.abspath(source_path),
+            filesystem=_filesystem_for(source_path),
+            pre_buffer=True,
+            buffer_size=READ_BUFFER_SIZE,
+        )
         
-        if len(df_sample) == 0:
+        # Row count comes from the footer, so empty files are skipped before any decode
+        num_rows = pf.metadata.num_rows
+        if num_rows == 0:
             print(f"  ⚠️  Skipping {source_path.name}: no rows found")
             return False
         
+        print(f"    File has {num_rows} rows, taking first {min(SAMPLE_SIZE, num_rows)}...")
+        
+        if columns:
+            columns = _project_columns(columns, set(pf.schema_arrow.names), source_path.name)
+            if columns is None:
+                return False
+        
+        if engine == "polars" and pl is not None:
+            # Lazy scan pushes the limit into the reader; rows stay in Arrow memory
+            lf = pl.scan_parquet(source_path, parallel="row_groups")
+            if columns:
+                lf = lf.select(columns)
+            # Cast back to the source schema (polars widens string to large_string and
+            # drops metadata) so both engines write identical samples
+            source_schema = pf.schema_arrow
+            if columns:
+                source_schema = pa.schema(
+                    [source_schema.field(c) for c in columns], metadata=source_schema.metadata
+                )
+            table = lf.head(SAMPLE_SIZE).collect().to_arrow().cast(source_schema)
+        else:
+            try:
+                batch = next(pf.iter_batches(batch_size=SAMPLE_SIZE, columns=columns, use_threads=True))
+                # Stay in Arrow end to end; the full-file schema keeps field and pandas metadata
+                schema = pf.schema_arrow if columns is None else batch.schema
+                table = pa.Table.from_batches([batch], schema=schema)
+            except StopIteration:
+                table = pf.read(columns=columns, use_threads=True)
+        
         # Write sample file
         print(f"    Writing sample to {sample_path.name}...")
-        df_sample.to_parquet(sample_path, index=False, engine='pyarrow')
+        _write_sample(table, sample_path, _source_compression(pf))
         
-        print(f"  ✅ Created sample: {sample_path.name} ({len(df_sample)} rows)")
+        print(f"  ✅ Created sample: {sample_path.name} ({table.num_rows} rows)")
         return True
-    except pd.errors.ParquetFileException as e:
+    except pa.ArrowInvalid as e:
         print(f"  ❌ Error reading parquet {source_path.name}: {str(e)}")
         return False
     except Exception as e:
         print(f"  ❌ Error processing {source_path.name}: {str(e)}")
         return False
 
+def main_dataset(root_dir, columns=None, force=False, max_files=None):
+    """Create samples for parquet files under root_dir via a pyarrow dataset
+    
+    Arrow discovers the files, but fragments are sampled one at a time here, and
+    exclude_invalid_files opens every file during discovery to validate it. This
+    avoids Python-side walking and process start-up, so it suits many small files;
+    the default process-pool path scales better when per-file decode dominates.
+    
+    Unlike the per-file walker, ds.dataset skips files and directories whose names
+    start with "_" or "." (its default ignore_prefixes).
+    """
+    import pyarrow.dataset as ds
+    
+    # Invalid (non-parquet) files are dropped, at the cost of opening each file up front
+    print(f"Scanning parquet dataset in {root_dir}...")
+    dataset = ds.dataset(
+        os.path.abspath(root_dir),
+        filesystem=_filesystem_for(root_dir),
+        format="parquet",
+        exclude_invalid_files=True,
+    )
+    
+    success_count = 0
+    skip_count = 0
+    error_count = 0
+    seen = 0
+    
+    try:
+        for fragment in dataset.get_fragments():
+            source_path = Path(fragment.path)
+            if "_sample" in source_path.name or "snapshots" in fragment.path:
+                continue
+            
+            # Same limit as the per-file path: the first N source files discovered
+            if max_files and seen >= max_files:
+                print(f"Limited to first {max_files} files for testing")
+                break
+            seen += 1
+            
+            sample_path = source_path.parent / source_path.name.replace(".parquet", "_sample.parquet")
+            if (not force and sample_path.exists()
+                    and sample_path.stat().st_mtime >= source_path.stat().st_mtime):
+                print(f"⏭️  Skipping {source_path.name}: sample is up to date")
+                skip_count += 1
+                continue
+            
+            print(f"Processing: {source_path.name}")
+            try:
+                fragment_columns = columns
+                if columns:
+                    fragment_columns = _project_columns(
+                        columns, set(fragment.physical_schema.names), source_path.name
+                    )
+                    if fragment_columns is None:
+                        error_count += 1
+                        continue
+                
+                # Files may not share a schema, so scan each with its own
+                batches = fragment.to_batches(
+                    schema=fragment.physical_schema,
+                    columns=fragment_columns,
+                    batch_size=SAMPLE_SIZE,
+                )
+                
+                # Batches stop at row group boundaries, so keep reading until SAMPLE_SIZE rows
+                collected = []
+                row_count = 0
+                for batch in batches:
+                    collected.append(batch)
+                    row_count += batch.num_rows
+                    if row_count >= SAMPLE_SIZE:
+                        break
+                if row_count == 0:
+                    print(f"  ⚠️  Skipping {source_path.name}: no rows found")
+                    error_count += 1
+                    continue
+                
+                table = pa.Table.from_batches(collected).slice(0, SAMPLE_SIZE)
+                if fragment_columns is None:
+                    # Keep field and pandas metadata, as the per-file path does
+                    table = table.replace_schema_metadata(fragment.physical_schema.metadata)
+                
+                _write_sample(table, sample_path, _source_compression(fragment))
+                print(f"  ✅ Created sample: {sample_path.name} ({table.num_rows} rows)")
+                success_count += 1
+            except Exception as e:
+                print(f"  ❌ Error processing {source_path.name}: {str(e)}")
+                error_count += 1
+    except KeyboardInterrupt:
+        print("\n\n⚠️  Interrupted by user")
+    
+    print(f"\n✅ Complete!")
+    print(f"   Created: {success_count} sample files")
+    print(f"   Skipped: {skip_count} (up to date)")
+    print(f"   Errors: {error_count}")
+
 def main():
-    import sys
+    import argparse
     
+    parser = argparse.ArgumentParser(description="Create sample versions of parquet files")
     # Allow limiting number of files for testing
-    max_files = int(sys.argv[1]) if len(sys.argv) > 1 and sys.argv[1].isdigit() else None
+    parser.add_argument("max_files", nargs="?", type=int, help="Only process the first N files")
+    parser.add_argument("--columns", nargs="+",
+                        help="Only read and write these columns (default: all, or SAMPLE_COLUMNS env)")
+    parser.add_argument("--engine", choices=["arrow", "polars"], default="arrow",
+                        help="Library used to read samples; both write the source schema and codec "
+                             "(polars falls back to arrow if not installed)")
+    parser.add_argument("--force", action="store_true",
+                        help="Recreate samples even when they are newer than their source")
+    parser.add_argument("--dataset", action="store_true",
+                        help="Discover and sample all of DATA_DIR with one pyarrow dataset scan (arrow engine only)")
+    args = parser.parse_args()
+    if args.dataset and args.engine != "arrow":
+        parser.error("--dataset only supports --engine arrow")
+    
+    max_files = args.max_files
+    columns = args.columns
+    if columns is None and SAMPLE_COLUMNS:
+        columns = [c.strip() for c in SAMPLE_COLUMNS.split(",") if c.strip()]
+    
+    engine = args.engine
+    if engine == "polars" and pl is None:
+        print("⚠️  polars not installed, falling back to arrow engine")
+        engine = "arrow"
+    
+    if args.dataset:
+        main_dataset(DATA_DIR, columns=columns, force=args.force, max_files=max_files)
+        return
     
     print(f"Finding parquet files in {DATA_DIR}...")
     files = find_parquet_files(DATA_DIR)
@@ -84,36 +328,51 @@ def main():
         print(f"Limiting to first {max_files} files for testing...")
     
     print(f"Found {len(files)} parquet files")
+    if columns:
+        print(f"Projecting columns: {', '.join(columns)}")
     print(f"Creating sample files with {SAMPLE_SIZE} records each...\n")
     
     success_count = 0
     skip_count = 0
     error_count = 0
     
+    pending = []
     for i, file_info in enumerate(files, 1):
-        # Check if sample already exists
-        if file_info["sample"].exists():
-            print(f"[{i}/{len(files)}] ⏭️  Skipping {file_info['name']}: sample already exists")
+        # Make-style incremental run: skip samples at least as new as their source
+        if (not args.force and file_info["sample_exists"]
+                and file_info["sample_mtime"] >= file_info["source_mtime"]):
+            print(f"[{i}/{len(files)}] ⏭️  Skipping {file_info['name']}: sample is up to date")
             skip_count += 1
             continue
-        
-        print(f"[{i}/{len(files)}] Processing: {file_info['name']}")
+        pending.append(file_info)
+    
+    # Each file is independent, so sample them in parallel across CPU cores
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as ex:
+        futures = {
+            ex.submit(create_sample_file, fi["source"], fi["sample"], columns, fi["size"], engine): fi
+            for fi in pending
+        }
         try:
-            if create_sample_file(file_info["source"], file_info["sample"]):
-                success_count += 1
-            else:
-                error_count += 1
+            for done, future in enumerate(as_completed(futures), 1):
+                file_info = futures[future]
+                try:
+                    if future.result():
+                        success_count += 1
+                        print(f"[{done}/{len(pending)}] Done: {file_info['name']}")
+                    else:
+                        error_count += 1
+                        print(f"[{done}/{len(pending)}] Failed: {file_info['name']}")
+                except Exception as e:
+                    print(f"  ❌ Fatal error ({file_info['name']}): {str(e)}")
+                    error_count += 1
         except KeyboardInterrupt:
             print("\n\n⚠️  Interrupted by user")
-            break
-        except Exception as e:
-            print(f"  ❌ Fatal error: {str(e)}")
-            error_count += 1
+            ex.shutdown(cancel_futures=True)
     
     print(f"\n✅ Complete!")
     print(f"   Processed: {len(files)} files")
     print(f"   Created: {success_count} sample files")
-    print(f"   Skipped: {skip_count} (already exist)")
+    print(f"   Skipped: {skip_count} (up to date)")
     print(f"   Errors: {error_count}")
 
 if __name__ == "__main__":
@@ -17,6 +17,20 @@ except ImportError:
     sys.exit(1)
 
 
+# Resource types and tracker domains not needed to extract article text
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font", "stylesheet"}
+BLOCKED_DOMAINS = ("doubleclick", "googletag", "chartbeat", "segment.io", "scorecardresearch")
+
+
+def block_heavy_resources(route):
+    """Abort requests for images, media, fonts, stylesheets, and known trackers."""
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or any(d in request.url for d in BLOCKED_DOMAINS):
+        route.abort()
+    else:
+        route.continue_()
+
+
 def scrape_nytimes_article(url: str, headless: bool = False, use_persistent_context: bool = True):
     """
     Scrape a NYTimes article.
@@ -48,14 +62,8 @@ def scrape_nytimes_article(url: str, headless: bool = False, use_persistent_cont
             page = context.new_page()
         
         try:
-            print("Navigating to article...")
-            page.goto(url, wait_until="networkidle", timeout=60000)
-            
-            # Wait for article content to load
-            print("Waiting for content to load...")
-            page.wait_for_timeout(3000)
+            page.route("**/*", block_heavy_resources)
             
-            # Try to find the article content
             # NYTimes uses various selectors for article content
             article_selectors = [
                 'article[data-testid="article"]',
@@ -65,22 +73,33 @@ def scrape_nytimes_article(url: str, headless: bool = False, use_persistent_cont
                 '.StoryBodyCompanionColumn',
                 'div[class*="article"]',
             ]
+            article_union = ", ".join(article_selectors)
             
+            print("Navigating to article...")
+            page.goto(url, wait_until="domcontentloaded", timeout=60000)
+            
+            # Wait for the article itself rather than a fixed delay
+            print("Waiting for content to load...")
+            try:
+                page.wait_for_selector(article_union, state="visible", timeout=15000)
+            except Exception:
+                print("Article element did not become visible, continuing")
+            if not headless:
+                page.wait_for_timeout(500)  # Brief settle time when watching the browser
+            
+            # The union wait above covers loading; pick the element by selector priority
             article_content = None
             for selector in article_selectors:
-                try:
-                    element = page.wait_for_selector(selector, timeout=5000)
-                    if element:
-                        article_content = element.inner_text()
-                        print(f"Found article content using selector: {selector}")
-                        break
-                except Exception:
-                    continue
+                article_elem = page.query_selector(selector)
+                if article_elem:
+                    article_content = article_elem.inner_text()
+                    print(f"Found article content using selector: {selector}")
+                    break
             
             if not article_content:
-                # Fallback: get all text from body
+                # Fallback: extract text in the browser and return only the string
                 print("Using fallback: extracting all body text")
-                article_content = page.locator('body').inner_text()
+                article_content = page.evaluate("() => document.body.innerText")
             
             # Extract metadata
             title = page.title()
@@ -93,11 +112,10 @@ def scrape_nytimes_article(url: str, headless: bool = False, use_persistent_cont
                 '[rel="author"]',
                 'span[itemprop="author"]',
             ]
-            for selector in author_selectors:
+            for author_elem in page.query_selector_all(", ".join(author_selectors)):
                 try:
-                    author_elem = page.query_selector(selector)
-                    if author_elem:
-                        author = author_elem.inner_text().strip()
+                    author = author_elem.inner_text().strip()
+                    if author:
                         break
                 except Exception:
                     continue
@@ -109,11 +127,10 @@ def scrape_nytimes_article(url: str, headless: bool = False, use_persistent_cont
                 '[data-testid="timestamp"]',
                 'time',
             ]
-            for selector in date_selectors:
+            for date_elem in page.query_selector_all(", ".join(date_selectors)):
                 try:
-                    date_elem = page.query_selector(selector)
-                    if date_elem:
-                        pub_date = date_elem.get_attribute('datetime') or date_elem.inner_text()
+                    pub_date = date_elem.get_attribute('datetime') or date_elem.inner_text()
+                    if pub_date:
                         break
                 except Exception:
                     continue
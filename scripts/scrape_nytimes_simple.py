@@ -6,11 +6,13 @@ Uses your existing browser session if you're logged in to NYTimes.
 
 import sys
 import json
+import argparse
+import asyncio
 from pathlib import Path
 
 # Try to import playwright, with helpful error message
 try:
-    from playwright.sync_api import sync_playwright
+    from playwright.async_api import async_playwright
 except ImportError:
     print("Error: playwright not installed.")
     print("\nTo install:")
@@ -22,68 +24,115 @@ except ImportError:
     sys.exit(1)
 
 
-def scrape_article(url: str):
-    """Scrape NYTimes article using persistent browser context."""
-    print(f"Scraping: {url}\n")
+# Resource types and tracker domains not needed to extract article text
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font", "stylesheet"}
+BLOCKED_DOMAINS = ("doubleclick", "googletag", "chartbeat", "segment.io", "scorecardresearch")
+
+# Number of article tabs loaded concurrently; NYTimes tolerates a handful
+DEFAULT_CONCURRENCY = 5
+
+
+async def block_heavy_resources(route):
+    """Abort requests for images, media, fonts, stylesheets, and known trackers."""
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or any(d in request.url for d in BLOCKED_DOMAINS):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+class NYTScraper:
+    """Persistent browser context reused across many concurrent article scrapes."""
+    
+    def __init__(self, interactive: bool = False):
+        self.interactive = interactive
+        self.playwright = None
+        self.context = None
     
-    with sync_playwright() as p:
+    async def __aenter__(self):
         # Use persistent context to maintain cookies/session
         user_data_dir = Path.home() / ".playwright-nytimes"
         user_data_dir.mkdir(exist_ok=True)
         
         print("Launching browser (this may take a moment)...")
-        context = p.chromium.launch_persistent_context(
-            user_data_dir=str(user_data_dir),
-            headless=False,  # Visible so you can log in if needed
-            args=['--disable-blink-features=AutomationControlled'],
-        )
+        self.playwright = await async_playwright().start()
+        try:
+            self.context = await self.playwright.chromium.launch_persistent_context(
+                user_data_dir=str(user_data_dir),
+                headless=False,  # Visible so you can log in if needed
+                args=['--disable-blink-features=AutomationControlled'],
+            )
+            await self.context.route("**/*", block_heavy_resources)
+        except Exception:
+            await self.playwright.stop()
+            raise
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            # Auto-close after a brief delay (or wait for user input if interactive)
+            if self.interactive:
+                await asyncio.to_thread(input, "\nPress Enter to close the browser...")
+            else:
+                await asyncio.sleep(2)  # Brief delay to see results
+            await self.context.close()
+        finally:
+            await self.playwright.stop()
+    
+    async def scrape(self, url: str):
+        """Scrape one NYTimes article in its own tab of the shared browser context."""
+        print(f"Scraping: {url}\n")
         
-        page = context.pages[0] if context.pages else context.new_page()
+        page = await self.context.new_page()
         
         try:
-            print("Navigating to article...")
-            page.goto(url, wait_until="networkidle", timeout=60000)
-            
-            print("Waiting for content to load...")
-            page.wait_for_timeout(3000)
-            
-            # Extract article content
-            print("Extracting article content...")
-            
-            # Try multiple selectors for article content
-            content = None
-            for selector in [
+            article_selectors = [
                 'article[data-testid="article"]',
                 'section[data-testid="article-body"]',
                 '.StoryBodyCompanionColumn',
                 'article',
-            ]:
-                try:
-                    elem = page.query_selector(selector)
-                    if elem:
-                        content = elem.inner_text()
-                        if len(content) > 500:  # Make sure we got substantial content
-                            print(f"✓ Found content using: {selector}")
-                            break
-                except:
-                    continue
+            ]
+            article_union = ", ".join(article_selectors)
+            
+            print(f"[{url}] Navigating to article...")
+            await page.goto(url, wait_until="domcontentloaded", timeout=60000)
+            
+            # Wait for the article itself rather than a fixed delay
+            print(f"[{url}] Waiting for content to load...")
+            try:
+                await page.wait_for_selector(article_union, state="visible", timeout=15000)
+            except Exception:
+                print(f"[{url}] Article element did not become visible, continuing")
+            await page.wait_for_timeout(500)  # Brief settle time; this browser is always visible
+            
+            # Extract article content; the union wait above covers loading,
+            # so pick the element by selector priority without further waits
+            print(f"[{url}] Extracting article content...")
+            content = None
+            for selector in article_selectors:
+                elem = await page.query_selector(selector)
+                if elem:
+                    content = await elem.inner_text()
+                    if len(content) > 500:  # Make sure we got substantial content
+                        print(f"[{url}] ✓ Found content using: {selector}")
+                        break
             
             if not content or len(content) < 500:
-                # Fallback: get body text
-                content = page.locator('body').inner_text()
+                # Fallback: get body text, extracted in the browser as a single string
+                content = await page.evaluate("() => document.body.innerText")
             
             # Extract metadata
-            title = page.title()
+            title = await page.title()
             
             # Try to get author
             author = None
-            for selector in ['[data-testid="byline-author"]', '.byline-author', '[rel="author"]']:
+            author_selectors = ['[data-testid="byline-author"]', '.byline-author', '[rel="author"]']
+            for elem in await page.query_selector_all(", ".join(author_selectors)):
                 try:
-                    elem = page.query_selector(selector)
-                    if elem:
-                        author = elem.inner_text().strip()
+                    author = (await elem.inner_text()).strip()
+                    if author:
                         break
-                except:
+                except Exception:
                     continue
             
             result = {
@@ -94,7 +143,7 @@ def scrape_article(url: str):
                 "content_length": len(content),
             }
             
-            print(f"\n✓ Success!")
+            print(f"\n✓ Success: {url}")
             print(f"  Title: {title}")
             print(f"  Author: {author or 'Not found'}")
             print(f"  Content: {len(content)} characters\n")
@@ -102,47 +151,93 @@ def scrape_article(url: str):
             return result
             
         except Exception as e:
-            print(f"\n✗ Error: {e}")
+            print(f"\n✗ Error ({url}): {e}")
             print("\nIf you see a paywall:")
             print("  1. Log in to NYTimes in the browser window that opened")
             print("  2. Run this script again - it will use your saved session")
             raise
         finally:
-            # Auto-close after a brief delay (or wait for user input if interactive)
-            import time
-            if '--interactive' in sys.argv:
-                input("\nPress Enter to close the browser...")
-            else:
-                time.sleep(2)  # Brief delay to see results
-            context.close()
+            await page.close()
+    
+    async def scrape_many(self, urls: list[str], concurrency: int = DEFAULT_CONCURRENCY):
+        """Scrape several articles in parallel tabs, at most `concurrency` at a time."""
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def scrape_one(url):
+            # One failed URL (paywall, timeout) must not cancel the rest of the batch
+            async with semaphore:
+                try:
+                    return await self.scrape(url)
+                except Exception as e:
+                    return {"url": url, "error": str(e)}
+        
+        return await asyncio.gather(*(scrape_one(url) for url in urls))
 
 
-if __name__ == "__main__":
-    import argparse
+async def scrape_many(urls: list[str], concurrency: int = DEFAULT_CONCURRENCY, interactive: bool = False):
+    """Scrape several NYTimes articles concurrently in one persistent browser context.
     
-    parser = argparse.ArgumentParser(description="Scrape a NYTimes article")
-    parser.add_argument("url", nargs="?", default="https://www.nytimes.com/2026/01/13/opinion/openai-ai-bubble-financing.html", 
-                       help="URL of the NYTimes article")
+    Returns one result per URL, in order; failed URLs yield {"url", "error"} records.
+    """
+    # Checked before launching the browser: Semaphore(0) would block every tab forever
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+    async with NYTScraper(interactive=interactive) as scraper:
+        return await scraper.scrape_many(urls, concurrency=concurrency)
+
+
+def positive_int(value: str) -> int:
+    """argparse type for integers >= 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def scrape_article(url: str):
+    """Scrape NYTimes article using persistent browser context."""
+    result = asyncio.run(scrape_many([url], interactive='--interactive' in sys.argv))[0]
+    if "error" in result:
+        raise RuntimeError(result["error"])
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape NYTimes articles")
+    parser.add_argument("urls", nargs="*", default=["https://www.nytimes.com/2026/01/13/opinion/openai-ai-bubble-financing.html"],
+                       help="URLs of the NYTimes articles")
     parser.add_argument("--output", "-o", default="nytimes_article.json",
-                       help="Output JSON file path")
+                       help="Output JSON file path (a list when several URLs are given)")
     parser.add_argument("--interactive", action="store_true",
                        help="Wait for user input before closing browser")
+    parser.add_argument("--concurrency", type=positive_int, default=DEFAULT_CONCURRENCY,
+                       help="Maximum number of articles loaded at once")
     
     args = parser.parse_args()
-    url = args.url
+    urls = args.urls
     output_file = args.output
     
     try:
-        result = scrape_article(url)
+        results = asyncio.run(scrape_many(urls, concurrency=args.concurrency, interactive=args.interactive))
+        successes = [r for r in results if "error" not in r]
+        failures = [r for r in results if "error" in r]
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(result, f, indent=2, ensure_ascii=False)
+        if successes:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                json.dump(successes[0] if len(urls) == 1 else successes, f, indent=2, ensure_ascii=False)
+            
+            print(f"✓ Saved {len(successes)} article(s) to: {output_file}")
+            for result in successes:
+                print(f"\nArticle preview (first 500 chars): {result['url']}")
+                print("=" * 60)
+                print(result["content"][:500])
+                print("...")
         
-        print(f"✓ Saved to: {output_file}")
-        print(f"\nArticle preview (first 500 chars):")
-        print("=" * 60)
-        print(result["content"][:500])
-        print("...")
+        if failures:
+            print(f"\n✗ Failed to scrape {len(failures)} of {len(results)} article(s):")
+            for result in failures:
+                print(f"  {result['url']}: {result['error']}")
+            sys.exit(1)
         
     except KeyboardInterrupt:
         print("\n\nCancelled")